@@ -83,6 +83,27 @@ class TestUtilityFunctions(unittest.TestCase):
         self.assertEqual(4, tlvs[2].length)
         self.assertEqual(b'\xfe\xed\xfa\xce', tlvs[2].value)
 
+    def test_parse_tlvs_long(self):
+        data = Tlv(0x7f49, b'hi'*200) + Tlv(0x71, b'x'*128) + Tlv(0x72, b'')
+        tlvs = parse_tlvs(data)
+        self.assertEqual(3, len(tlvs))
+
+        self.assertEqual(0x7f49, tlvs[0].tag)
+        self.assertEqual(b'hi'*200, tlvs[0].value)
+
+        self.assertEqual(0x71, tlvs[1].tag)
+        self.assertEqual(b'x'*128, tlvs[1].value)
+
+        self.assertEqual(0x72, tlvs[2].tag)
+        self.assertEqual(b'', tlvs[2].value)
+
+    def test_tlv_parse_items(self):
+        data = Tlv(0x71, b'name') + Tlv(0x7f49, b'hi'*200) + Tlv(0x77, b'')
+        self.assertEqual(
+            [(0x71, b'name'), (0x7f49, b'hi'*200), (0x77, b'')],
+            Tlv.parse_items(data))
+        self.assertEqual([], Tlv.parse_items(b''))
+
     def test_parse_truncated(self):
         self.assertEqual(0x01020304, parse_truncated(b'\1\2\3\4'))
         self.assertEqual(0xdeadbeef & 0x7fffffff,
@@ -94,6 +115,8 @@ class TestUtilityFunctions(unittest.TestCase):
                          time_challenge(12345678))
         self.assertEqual(b'\x00\x00\x00\x00\x02\xf2\xeaC',
                          time_challenge(1484223461.2644958))
+        self.assertEqual(b'\0'*7 + b'\1', time_challenge(59.999999))
+        self.assertEqual(b'\0'*7 + b'\2', time_challenge(120, period=60))
 
     def test_tlv(self):
         self.assertEqual(Tlv(b'\xfe\6foobar'), Tlv(0xfe, b'foobar'))
@@ -27,6 +27,8 @@
 
 from __future__ import absolute_import
 
+import hashlib
+import hmac
 import os
 import re
 import struct
@@ -35,8 +37,7 @@ import time
 from base64 import b64encode
 from functools import total_ordering
 from enum import IntEnum, unique
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from cryptography.hazmat.primitives import hmac, hashes
+from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.backends import default_backend
 from six.moves.urllib.parse import unquote, urlparse, parse_qs
 from .driver_ccid import APDUError, SW
@@ -48,6 +49,9 @@ from .util import (
 
 HMAC_MINIMUM_KEY_SIZE = 14
 
+_PACK_I = struct.Struct('>I').pack
+_PACK_BB = struct.Struct('>BB').pack
+
 
 @unique
 class TAG(IntEnum):
@@ -102,6 +106,16 @@ class MASK(IntEnum):
     TYPE = 0xf0
 
 
+# Plain int copies of constants used in loops, to skip enum overhead.
+_INS_SEND_REMAINING = int(INS.SEND_REMAINING)
+_TAG_TRUNCATED_RESPONSE = int(TAG.TRUNCATED_RESPONSE)
+_TAG_NO_RESPONSE = int(TAG.NO_RESPONSE)
+_TAG_TOUCH = int(TAG.TOUCH)
+_MASK_TYPE = int(MASK.TYPE)
+_SW_MORE_DATA = int(SW.MORE_DATA)
+_SW_OK = int(SW.OK)
+
+
 class CredentialData(object):
 
     def __init__(self, secret, issuer, name, oath_type=OATH_TYPE.TOTP,
@@ -193,8 +207,15 @@ class Credential(object):
 
 
 def _derive_key(salt, passphrase):
-    kdf = PBKDF2HMAC(hashes.SHA1(), 16, salt, 1000, default_backend())
-    return kdf.derive(passphrase.encode('utf-8'))
+    return hashlib.pbkdf2_hmac(
+        'sha1', passphrase.encode('utf-8'), salt, 1000, 16)
+
+
+try:
+    _hmac_digest = hmac.digest  # Python 3.7+
+except AttributeError:
+    def _hmac_digest(key, msg, digest):
+        return hmac.new(key, msg, digest).digest()
 
 
 def _get_device_id(device_salt):
@@ -220,7 +241,7 @@ class OathController(object):
     def __init__(self, driver):
         resp = driver.select(AID.OATH)
         tags = Tlv.parse_dict(resp)
-        self._version = tuple(six.iterbytes(tags[TAG.VERSION]))
+        self._version = tuple(bytearray(tags[TAG.VERSION]))
         self._salt = tags[TAG.NAME]
         self._id = _get_device_id(self._salt)
         self._challenge = tags.get(TAG.CHALLENGE)
@@ -251,12 +272,15 @@ class OathController(object):
 
     def send_apdu(self, ins, p1, p2, data=b''):
         resp, sw = self._driver.send_apdu(0, ins, p1, p2, data, check=None)
-        while (sw >> 8) == SW.MORE_DATA:
-            more, sw = self._driver.send_apdu(
-                0, INS.SEND_REMAINING, 0, 0, b'', check=None)
-            resp += more
-
-        if sw != SW.OK:
+        if (sw >> 8) == _SW_MORE_DATA:
+            parts = [resp]
+            while (sw >> 8) == _SW_MORE_DATA:
+                more, sw = self._driver.send_apdu(
+                    0, _INS_SEND_REMAINING, 0, 0, b'', check=None)
+                parts.append(more)
+            resp = b''.join(parts)
+
+        if sw != _SW_OK:
             raise APDUError(resp, sw)
 
         return resp
@@ -271,33 +295,35 @@ class OathController(object):
     def put(self, credential_data):
         d = credential_data
         key = d.make_key()
-        secret_header = bytearray([d.oath_type | d.algorithm, d.digits])
         secret = hmac_shorten_key(d.secret, d.algorithm.name)
         secret = secret.ljust(HMAC_MINIMUM_KEY_SIZE, b'\x00')
-        data = Tlv(TAG.NAME, key) + Tlv(TAG.KEY, secret_header + secret)
+        secret = _PACK_BB(d.oath_type | d.algorithm, d.digits) + secret
+        parts = [Tlv(TAG.NAME, key), Tlv(TAG.KEY, secret)]
         properties = 0
 
         if d.touch:
             properties |= PROPERTIES.REQUIRE_TOUCH
 
         if properties:
-            data += bytearray([TAG.PROPERTY, properties])
+            parts.append(_PACK_BB(TAG.PROPERTY, properties))
 
         if d.counter > 0:
-            data += Tlv(TAG.IMF, struct.pack('>I', d.counter))
+            parts.append(Tlv(TAG.IMF, _PACK_I(d.counter)))
 
-        self.send_apdu(INS.PUT, 0, 0, bytes(data))
+        self.send_apdu(INS.PUT, 0, 0, b''.join(parts))
         return Credential(key, d.oath_type, d.touch)
 
     def list(self):
         def _gen_creds():
             resp = self.send_apdu(INS.LIST, 0, 0)
-            while resp:
-                length = six.indexbytes(resp, 1) - 1
-                oath_type = OATH_TYPE(MASK.TYPE & six.indexbytes(resp, 2))
-                key = resp[3:3 + length]
+            offs = 0
+            while offs < len(resp):
+                length = six.indexbytes(resp, offs + 1) - 1
+                oath_type = OATH_TYPE(
+                    _MASK_TYPE & six.indexbytes(resp, offs + 2))
+                key = resp[offs + 3:offs + 3 + length]
                 yield Credential(key, oath_type)
-                resp = resp[3 + length:]
+                offs += 3 + length
 
         return list(_gen_creds())
 
@@ -347,21 +373,21 @@ class OathController(object):
             valid_to = valid_from + 30
             data = Tlv(TAG.CHALLENGE, time_challenge(timestamp))
             resp = self.send_apdu(INS.CALCULATE_ALL, 0, 0x01, data)
-            tlvs = Tlv.parse_list(resp)
-            while tlvs:
-                key = tlvs.pop(0).value
-                resp = tlvs.pop(0)
-                oath_type = OATH_TYPE.HOTP if resp.tag == TAG.NO_RESPONSE else \
+            items = Tlv.parse_items(resp)
+            for i in range(0, len(items), 2):
+                key = items[i][1]
+                tag, value = items[i + 1]
+                oath_type = OATH_TYPE.HOTP if tag == _TAG_NO_RESPONSE else \
                     OATH_TYPE.TOTP
-                touch = resp.tag == TAG.TOUCH
+                touch = tag == _TAG_TOUCH
                 cred = Credential(key, oath_type, touch)
 
-                if resp.tag == TAG.TRUNCATED_RESPONSE:
+                if tag == _TAG_TRUNCATED_RESPONSE:
                     if cred.period != 30 or cred.is_steam:
                         code = self.calculate(cred, timestamp)
                     else:
-                        digits = six.indexbytes(resp.value, 0)
-                        code_value = parse_truncated(resp.value[1:])
+                        digits = six.indexbytes(value, 0)
+                        code_value = parse_truncated(value[1:])
                         code_value = format_code(code_value, digits)
                         code = Code(code_value, valid_from, valid_to)
                 else:
@@ -372,13 +398,14 @@ class OathController(object):
 
     def set_password(self, password):
         key = self.derive_key(password)
-        keydata = bytearray([OATH_TYPE.TOTP | ALGO.SHA1]) + key
+        keydata = six.int2byte(OATH_TYPE.TOTP | ALGO.SHA1) + key
         challenge = os.urandom(8)
-        h = hmac.HMAC(key, hashes.SHA1(), default_backend())
-        h.update(challenge)
-        response = h.finalize()
-        data = Tlv(TAG.KEY, keydata) + Tlv(TAG.CHALLENGE, challenge) + Tlv(
-            TAG.RESPONSE, response)
+        response = _hmac_digest(key, challenge, hashlib.sha1)
+        data = b''.join([
+            Tlv(TAG.KEY, keydata),
+            Tlv(TAG.CHALLENGE, challenge),
+            Tlv(TAG.RESPONSE, response)
+        ])
         self.send_apdu(INS.SET_CODE, 0, 0, data)
         return key
 
@@ -386,13 +413,15 @@ class OathController(object):
         self.send_apdu(INS.SET_CODE, 0, 0, Tlv(TAG.KEY, b''))
 
     def validate(self, key):
-        h = hmac.HMAC(key, hashes.SHA1(), default_backend())
+        # Both MACs use the same key, so set up the HMAC state once.
+        base = hmac.new(key, digestmod=hashlib.sha1)
+        h = base.copy()
         h.update(self._challenge)
-        response = h.finalize()
+        response = h.digest()
         challenge = os.urandom(8)
-        h = hmac.HMAC(key, hashes.SHA1(), default_backend())
+        h = base.copy()
         h.update(challenge)
-        verification = h.finalize()
+        verification = h.digest()
         data = Tlv(TAG.RESPONSE, response) + Tlv(TAG.CHALLENGE, challenge)
         resp = self.send_apdu(INS.VALIDATE, 0, 0, data)
         if Tlv(resp).value != verification:
@@ -29,10 +29,11 @@ from __future__ import absolute_import
 
 import six
 import struct
+import hashlib
 import re
 import logging
 import random
-from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.backends import default_backend
 from cryptography import x509
 from enum import Enum, IntEnum, unique
@@ -47,6 +48,9 @@ logger = logging.getLogger(__name__)
 
 PEM_IDENTIFIER = b'-----BEGIN'
 
+_PACK_Q = struct.Struct('>q').pack
+_UNPACK_I = struct.Struct('>I').unpack_from
+
 
 class BitflagEnum(IntEnum):
     @classmethod
@@ -321,17 +325,27 @@ class Tlv(bytes):
         tlv = cls(data)
         return tlv, data[len(tlv):]
 
-    @classmethod
-    def parse_list(cls, data):
+    @staticmethod
+    def parse_items(data):
+        """Parse TLV data into (tag, value) pairs, without creating Tlvs."""
         res = []
-        while data:
-            tlv, data = cls.parse_from(data)
-            res.append(tlv)
+        offs = 0
+        while offs < len(data):
+            tag, tag_ln = _tlv_parse_tag(data, offs)
+            offs += tag_ln
+            ln, ln_ln = _tlv_parse_length(data, offs)
+            offs += ln_ln
+            res.append((tag, bytes(data[offs:offs + ln])))
+            offs += ln
         return res
 
+    @classmethod
+    def parse_list(cls, data):
+        return [cls(tag, value) for tag, value in cls.parse_items(data)]
+
     @classmethod
     def parse_dict(cls, data):
-        return dict((tlv.tag, tlv.value) for tlv in cls.parse_list(data))
+        return dict(cls.parse_items(data))
 
     @classmethod
     def unpack(cls, tag, data):
@@ -412,7 +426,7 @@ def format_code(code, digits=6, steam=False):
             code //= len(STEAM_CHAR_TABLE)
         return ''.join(chars)
     else:
-        return ('%%0%dd' % digits) % (code % 10 ** digits)
+        return '%0*d' % (digits, code % 10 ** digits)
 
 
 def parse_totp_hash(resp):
@@ -421,28 +435,29 @@ def parse_totp_hash(resp):
 
 
 def parse_truncated(resp):
-    return struct.unpack('>I', resp)[0] & 0x7fffffff
+    return _UNPACK_I(resp)[0] & 0x7fffffff
+
+
+_HMAC_HASHES = {  # Block size and constructor per algorithm
+    'SHA1': (64, hashlib.sha1),
+    'SHA256': (64, hashlib.sha256),
+    'SHA512': (128, hashlib.sha512),
+}
 
 
 def hmac_shorten_key(key, algo):
-    if algo.upper() == 'SHA1':
-        h = hashes.SHA1()
-    elif algo.upper() == 'SHA256':
-        h = hashes.SHA256()
-    elif algo.upper() == 'SHA512':
-        h = hashes.SHA512()
-    else:
+    try:
+        block_size, hash_func = _HMAC_HASHES[algo.upper()]
+    except KeyError:
         raise ValueError('Unsupported algorithm!')
 
-    if len(key) > h.block_size:
-        h = hashes.Hash(h, default_backend())
-        h.update(key)
-        key = h.finalize()
+    if len(key) > block_size:
+        key = hash_func(key).digest()
     return key
 
 
 def time_challenge(timestamp, period=30):
-    return struct.pack('>q', int(timestamp // period))
+    return _PACK_Q(int(timestamp) // period)
 
 
 def parse_key(val):